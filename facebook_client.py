@@ -7,40 +7,261 @@ Personal profile posting is not supported (deprecated by Facebook in 2018).
 from __future__ import annotations
 
 import os
+import re
+import json
 import logging
+import mimetypes
+import random
 import secrets
-from datetime import datetime, timedelta
-from urllib.parse import urlencode
-from typing import Optional
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from types import MappingProxyType
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote_plus, urlencode
+from typing import Any, Callable, Hashable, Iterable, Iterator, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # orjson decodes Graph payloads several times faster than the stdlib;
+    # use it when installed. Both raise ValueError subclasses on bad input.
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
 GRAPH_API_VERSION = "v21.0"
-GRAPH_API_BASE = f"https://graph.facebook.com/{GRAPH_API_VERSION}"
+GRAPH_API_HOST = "https://graph.facebook.com"
+GRAPH_API_BASE = f"{GRAPH_API_HOST}/{GRAPH_API_VERSION}"
 FACEBOOK_OAUTH_URL = f"https://www.facebook.com/{GRAPH_API_VERSION}/dialog/oauth"
 
+# Graph API caps most edges at 100 items per page; asking for the max up
+# front keeps the number of serial paging round-trips down.
+PAGE_SIZE = 100
+MAX_DISCOVERY_WORKERS = 8
+
+# FB photos endpoint accepts up to ~10MB. Anything larger will be
+# rejected regardless of upload method, so don't even try.
+PHOTO_MAX_BYTES = 10 * 1024 * 1024
+
+# Response bodies included in log messages are cut to this many characters.
+LOG_BODY_LIMIT = 2048
+
+# Rate limiting. HTTP 429/5xx on idempotent calls is retried by the
+# session's urllib3 adapter; these cover what urllib3 can't see: Graph's
+# usage headers and rate-limit error codes returned in 400/403 bodies.
+USAGE_THROTTLE_PERCENT = 75
+RATE_LIMIT_ERROR_CODES = frozenset({4, 17, 32, 613})
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF_BASE = 1.0
+RATE_LIMIT_BACKOFF_CAP = 60.0
+
+# Maximum number of sub-requests the Graph batch endpoint accepts per call.
+BATCH_LIMIT = 50
+
 FACEBOOK_SCOPES = os.environ.get(
     "FACEBOOK_SCOPES",
     "pages_manage_posts,pages_read_engagement,pages_show_list,business_management",
 )
 
+# Environment config is read once at import (after the app's load_dotenv).
+_ENV = MappingProxyType({
+    "app_id": os.environ.get("FACEBOOK_APP_ID"),
+    "app_secret": os.environ.get("FACEBOOK_APP_SECRET"),
+    "redirect_uri": os.environ.get(
+        "FACEBOOK_REDIRECT_URI", "http://localhost:5001/facebook/callback"
+    ),
+})
+
+# refresh_access_token skips the exchange unless the token expires within
+# this window, and reuses a just-completed exchange for the same token.
+REFRESH_BUFFER_MINUTES = 60 * 24
+REFRESH_REUSE_SECONDS = 30
+_RECENT_REFRESHES_MAX = 64
+
+# Profile/Page/Group listings change on the order of hours; cache them
+# briefly so page renders don't hit Graph every time.
+DISCOVERY_CACHE_TTL = 300
+DISCOVERY_CACHE_MAX = 4096
+
+# Field lists requested from the discovery endpoints.
+_PROFILE_FIELDS = "id,name,picture"
+_PAGE_FIELDS = "id,name,access_token,category"
+_BUSINESS_FIELDS = "id,name"
+_GROUP_FIELDS = "id,name,privacy"
+# The profile lookup only varies by token, so skip params encoding for it.
+_ME_PROFILE_URL = f"{GRAPH_API_BASE}/me?fields={quote_plus(_PROFILE_FIELDS)}&access_token="
+# Profile, personal/business Pages and admin Groups nested into one lookup.
+_BUNDLE_FIELDS = (
+    f"{_PROFILE_FIELDS},"
+    f"accounts.limit({PAGE_SIZE}){{{_PAGE_FIELDS}}},"
+    f"businesses.limit({PAGE_SIZE}){{id,owned_pages.limit({PAGE_SIZE}){{{_PAGE_FIELDS}}}}},"
+    f"groups.admin_only(true).limit({PAGE_SIZE}){{{_GROUP_FIELDS}}}"
+)
+_ME_BUNDLE_URL = f"{GRAPH_API_BASE}/me?fields={quote_plus(_BUNDLE_FIELDS)}&access_token="
+
+# Used by publish_smart_post to pick out the first link in a post.
+_URL_RE = re.compile(r'https?://[^\s<>"\')\]]+')
+_URL_TRAILING_PUNCT = ".,;:!?"
+
+
+class _TTLCache:
+    """Small thread-safe LRU cache whose entries expire after *ttl* seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[0]:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+def _token_key(access_token: str) -> str:
+    """Hash a token for use as a cache key so raw tokens aren't retained."""
+    return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+
+_refresh_locks: dict[str, threading.Lock] = {}
+_refresh_locks_guard = threading.Lock()
+_recent_refreshes = _TTLCache(maxsize=_RECENT_REFRESHES_MAX, ttl=REFRESH_REUSE_SECONDS)
+
+_DISCOVERY_KINDS = ("profile", "pages", "groups")
+# Failures the discovery lookups recover from; anything else is a bug.
+# Both json and orjson decode errors subclass ValueError.
+_DISCOVERY_ERRORS = (requests.RequestException, ValueError)
+
+
+def _cached_by_token(kind: str) -> Callable:
+    """Cache a ``method(self, access_token)`` result in the discovery cache.
+
+    Empty results (failed lookups) are not cached, so an error or expired
+    token doesn't stick for the whole TTL.
+    """
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self: FacebookClient, access_token: str):
+            key = (kind, _token_key(access_token))
+            cached = self._discovery_cache.get(key)
+            if cached is not None:
+                return cached
+            result = method(self, access_token)
+            if result:
+                self._discovery_cache.set(key, result)
+            return result
+        return wrapper
+    return decorator
+
 
 class FacebookClient:
     """Client for interacting with the Facebook Graph API."""
 
+    __slots__ = (
+        "app_id",
+        "app_secret",
+        "redirect_uri",
+        "_session",
+        "_auth_url_prefix",
+        "_code_exchange_request",
+        "_token_exchange_request",
+    )
+
+    # Shared across instances: keyed by a token hash, not by client.
+    _discovery_cache = _TTLCache(maxsize=DISCOVERY_CACHE_MAX, ttl=DISCOVERY_CACHE_TTL)
+
     def __init__(
         self,
         app_id: str | None = None,
         app_secret: str | None = None,
         redirect_uri: str | None = None,
     ):
-        self.app_id = app_id or os.environ.get("FACEBOOK_APP_ID")
-        self.app_secret = app_secret or os.environ.get("FACEBOOK_APP_SECRET")
-        self.redirect_uri = redirect_uri or os.environ.get(
-            "FACEBOOK_REDIRECT_URI", "http://localhost:5001/facebook/callback"
+        self.app_id = app_id or _ENV["app_id"]
+        self.app_secret = app_secret or _ENV["app_secret"]
+        self.redirect_uri = redirect_uri or _ENV["redirect_uri"]
+        # Only ``state`` varies between authorization URLs.
+        self._auth_url_prefix = f"{FACEBOOK_OAUTH_URL}?" + urlencode({
+            "client_id": self.app_id,
+            "redirect_uri": self.redirect_uri,
+            "scope": FACEBOOK_SCOPES,
+            "response_type": "code",
+        }) + "&state="
+        # Every call targets graph.facebook.com, so keep one pooled session
+        # around for HTTP keep-alive / TLS reuse. Retries only cover
+        # idempotent methods (urllib3 default), so posts are never duplicated.
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=50,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.5,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    raise_on_status=False,
+                ),
+            ),
         )
+        self._session.hooks["response"].append(_rate_limit_hook)
+
+        # Login hits the two token exchanges on every OAuth round; only the
+        # code/token varies, so prepare the rest once.
+        token_url = f"{GRAPH_API_BASE}/oauth/access_token"
+        self._code_exchange_request = self._session.prepare_request(requests.Request(
+            "GET",
+            token_url,
+            params={
+                "client_id": self.app_id,
+                "client_secret": self.app_secret,
+                "redirect_uri": self.redirect_uri,
+            },
+        ))
+        self._token_exchange_request = self._session.prepare_request(requests.Request(
+            "GET",
+            token_url,
+            params={
+                "grant_type": "fb_exchange_token",
+                "client_id": self.app_id,
+                "client_secret": self.app_secret,
+            },
+        ))
+
+    def close(self) -> None:
+        """Release pooled connections held by the underlying session."""
+        self._session.close()
+
+    def __enter__(self) -> FacebookClient:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def is_configured(self) -> bool:
         return bool(self.app_id and self.app_secret)
@@ -51,78 +272,92 @@ class FacebookClient:
 
     def get_authorization_url(self, state: str | None = None) -> tuple[str, str]:
         if state is None:
-            state = secrets.token_urlsafe(32)
-
-        params = {
-            "client_id": self.app_id,
-            "redirect_uri": self.redirect_uri,
-            "scope": FACEBOOK_SCOPES,
-            "response_type": "code",
-            "state": state,
-        }
-        url = f"{FACEBOOK_OAUTH_URL}?{urlencode(params)}"
-        return url, state
+            state = secrets.token_urlsafe(16)  # 128 bits is ample for CSRF state
+        return self._auth_url_prefix + quote_plus(state), state
 
     def exchange_code_for_token(self, code: str) -> dict:
         """Exchange an authorization code for a short-lived user access token."""
-        params = {
-            "client_id": self.app_id,
-            "client_secret": self.app_secret,
-            "redirect_uri": self.redirect_uri,
-            "code": code,
-        }
-        response = requests.get(
-            f"{GRAPH_API_BASE}/oauth/access_token",
-            params=params,
-            timeout=30,
-        )
-        response.raise_for_status()
-        return response.json()
+        return self._send_token_exchange(self._code_exchange_request, "code", code)
 
     def get_long_lived_token(self, short_lived_token: str) -> dict:
         """Exchange a short-lived token for one valid ~60 days."""
-        params = {
-            "grant_type": "fb_exchange_token",
-            "client_id": self.app_id,
-            "client_secret": self.app_secret,
-            "fb_exchange_token": short_lived_token,
-        }
-        response = requests.get(
-            f"{GRAPH_API_BASE}/oauth/access_token",
-            params=params,
-            timeout=30,
+        return self._send_token_exchange(
+            self._token_exchange_request, "fb_exchange_token", short_lived_token,
         )
+
+    def _send_token_exchange(self, template: requests.PreparedRequest, name: str, value: str) -> dict:
+        """Send a copy of a prepared token-exchange request with one extra param."""
+        prepared = template.copy()
+        prepared.url = f"{prepared.url}&{name}={quote_plus(value)}"
+        settings = self._session.merge_environment_settings(prepared.url, {}, None, None, None)
+        response = self._session.send(prepared, timeout=30, **settings)
         response.raise_for_status()
-        return response.json()
+        return _json_loads(response.content)
 
-    def refresh_access_token(self, access_token: str) -> dict:
+    def refresh_access_token(self, access_token: str, expires_at: str | float | None = None) -> dict:
         """Refresh a long-lived token (returns a new long-lived token).
 
         Facebook long-lived tokens can be refreshed by exchanging them again
-        before they expire.
+        before they expire. When *expires_at* is given and the token is not
+        within REFRESH_BUFFER_MINUTES of expiry, the current token is handed
+        back without a Graph call. Concurrent refreshes of the same token
+        (web handlers plus the scheduler thread) collapse into one exchange.
         """
-        return self.get_long_lived_token(access_token)
+        if expires_at is not None and not is_token_expired(expires_at, buffer_minutes=REFRESH_BUFFER_MINUTES):
+            if not isinstance(expires_at, (int, float)):
+                expires_at = _expiry_to_epoch(expires_at)
+            return {"access_token": access_token, "expires_in": int(expires_at - time.time())}
+
+        key = _token_key(access_token)
+        with _refresh_locks_guard:
+            if len(_refresh_locks) > _RECENT_REFRESHES_MAX:
+                for stale in [k for k, lk in _refresh_locks.items() if not lk.locked()]:
+                    del _refresh_locks[stale]
+            lock = _refresh_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            cached = _recent_refreshes.get(key)
+            if cached is not None:
+                return cached
+
+            new_token = self.get_long_lived_token(access_token)
+            _recent_refreshes.set(key, new_token)
+            return new_token
 
     # ------------------------------------------------------------------
     # User / Page / Group discovery
     # ------------------------------------------------------------------
 
+    def invalidate_cache(self, access_token: str) -> None:
+        """Drop cached profile/Page/Group lookups for *access_token*."""
+        token_key = _token_key(access_token)
+        for kind in _DISCOVERY_KINDS:
+            self._discovery_cache.pop((kind, token_key))
+
+    @_cached_by_token("profile")
     def get_user_profile(self, access_token: str) -> dict | None:
         """Fetch the authenticated user's basic profile."""
         try:
-            response = requests.get(
-                f"{GRAPH_API_BASE}/me",
-                params={"fields": "id,name,picture", "access_token": access_token},
+            response = self._session.get(
+                _ME_PROFILE_URL + quote_plus(access_token),
                 timeout=30,
             )
-            if response.status_code == 200:
-                return response.json()
-            logger.error("Facebook profile fetch failed: %s - %s", response.status_code, response.text)
-            return None
-        except Exception as e:
+        except requests.RequestException as e:
             logger.error("Error fetching Facebook profile: %s", e)
             return None
 
+        if response.status_code == 200:
+            try:
+                return _json_loads(response.content)
+            except ValueError as e:
+                logger.error("Error decoding Facebook profile: %s", e)
+                return None
+        if response.status_code == 401:
+            self.invalidate_cache(access_token)
+        logger.error("Facebook profile fetch failed: %s - %s", response.status_code, _LazyText(response))
+        return None
+
+    @_cached_by_token("pages")
     def get_user_pages(self, access_token: str) -> list[dict]:
         """Return Pages the user manages, each with its own page access token.
 
@@ -131,94 +366,154 @@ class FacebookClient:
 
         Each dict contains: id, name, access_token, category.
         """
-        seen_ids: set[str] = set()
-        pages: list[dict] = []
+        page_params = {
+            "fields": _PAGE_FIELDS,
+            "limit": PAGE_SIZE,
+            "access_token": access_token,
+        }
 
-        # 1) Personal pages via /me/accounts
-        try:
-            url = f"{GRAPH_API_BASE}/me/accounts"
-            params = {
-                "fields": "id,name,access_token,category",
-                "access_token": access_token,
-            }
-            while url:
-                response = requests.get(url, params=params, timeout=30)
-                if response.status_code != 200:
-                    logger.error("Failed to fetch pages: %s - %s", response.status_code, response.text)
-                    break
-                data = response.json()
-                for page in data.get("data", []):
-                    if page["id"] not in seen_ids:
-                        seen_ids.add(page["id"])
-                        pages.append(page)
-                url = data.get("paging", {}).get("next")
-                params = {}
-        except Exception as e:
-            logger.error("Error fetching Facebook pages: %s", e)
-
-        # 2) Business-owned pages via /me/businesses -> /{biz}/owned_pages
-        try:
-            biz_resp = requests.get(
-                f"{GRAPH_API_BASE}/me/businesses",
-                params={"fields": "id,name", "access_token": access_token},
-                timeout=30,
-            )
-            if biz_resp.status_code == 200:
-                for biz in biz_resp.json().get("data", []):
-                    biz_id = biz["id"]
-                    url = f"{GRAPH_API_BASE}/{biz_id}/owned_pages"
-                    params = {
-                        "fields": "id,name,access_token,category",
-                        "access_token": access_token,
-                    }
-                    while url:
-                        resp = requests.get(url, params=params, timeout=30)
-                        if resp.status_code != 200:
-                            logger.warning(
-                                "Failed to fetch business %s pages: %s - %s",
-                                biz_id, resp.status_code, resp.text,
-                            )
-                            break
-                        data = resp.json()
-                        for page in data.get("data", []):
-                            if page["id"] not in seen_ids:
-                                seen_ids.add(page["id"])
-                                pages.append(page)
-                        url = data.get("paging", {}).get("next")
-                        params = {}
-            else:
-                logger.debug("No business accounts found (or permission not granted): %s", biz_resp.text)
-        except Exception as e:
-            logger.error("Error fetching business pages: %s", e)
+        def _collect(url: str, label: str, level: int = logging.ERROR) -> list[dict]:
+            found: list[dict] = []
+            try:
+                found.extend(self._iter_pages(url, page_params, label, level))
+            except _DISCOVERY_ERRORS as e:
+                logger.error("Error fetching %s: %s", label, e)
+            return found
+
+        # Cursor pagination has to be walked serially, but the personal
+        # listing and each business portfolio are independent, so walk them
+        # side by side.
+        with ThreadPoolExecutor(max_workers=MAX_DISCOVERY_WORKERS) as pool:
+            # 1) Personal pages via /me/accounts
+            futures = [pool.submit(_collect, f"{GRAPH_API_BASE}/me/accounts", "Facebook pages")]
 
-        return pages
+            # 2) Business-owned pages via /me/businesses -> /{biz}/owned_pages
+            try:
+                biz_resp = self._session.get(
+                    f"{GRAPH_API_BASE}/me/businesses",
+                    params={"fields": _BUSINESS_FIELDS, "limit": PAGE_SIZE, "access_token": access_token},
+                    timeout=30,
+                )
+                if biz_resp.status_code == 200:
+                    for biz in _json_loads(biz_resp.content).get("data", []):
+                        futures.append(pool.submit(
+                            _collect,
+                            f"{GRAPH_API_BASE}/{biz['id']}/owned_pages",
+                            f"business {biz['id']} pages",
+                            logging.WARNING,
+                        ))
+                else:
+                    logger.debug("No business accounts found (or permission not granted): %s", _LazyText(biz_resp))
+            except _DISCOVERY_ERRORS as e:
+                logger.error("Error fetching business pages: %s", e)
+
+        return _unique_by_id(future.result() for future in futures)
 
+    @_cached_by_token("groups")
     def get_user_groups(self, access_token: str) -> list[dict]:
         """Return Groups the user is an admin of.
 
         Each dict contains: id, name, privacy.
         """
         groups: list[dict] = []
+        params = {
+            "fields": _GROUP_FIELDS,
+            "admin_only": "true",
+            "limit": PAGE_SIZE,
+            "access_token": access_token,
+        }
         try:
-            url = f"{GRAPH_API_BASE}/me/groups"
-            params = {
-                "fields": "id,name,privacy",
-                "admin_only": "true",
-                "access_token": access_token,
-            }
-            while url:
-                response = requests.get(url, params=params, timeout=30)
-                if response.status_code != 200:
-                    logger.error("Failed to fetch groups: %s - %s", response.status_code, response.text)
-                    break
-                data = response.json()
-                groups.extend(data.get("data", []))
-                url = data.get("paging", {}).get("next")
-                params = {}
-        except Exception as e:
+            groups.extend(self._iter_pages(f"{GRAPH_API_BASE}/me/groups", params, "groups"))
+        except _DISCOVERY_ERRORS as e:
             logger.error("Error fetching Facebook groups: %s", e)
         return groups
 
+    def get_user_bundle(self, access_token: str) -> dict:
+        """Fetch profile, Pages and Groups in one request via field expansion.
+
+        Personal Pages, business-owned Pages and admin Groups are nested
+        into a single ``/me`` lookup; inner ``paging.next`` links are only
+        followed when present. If Graph rejects the expanded request (e.g.
+        a missing permission on one edge), falls back to the individual
+        lookups. Results also prime the discovery cache.
+
+        Returns a dict with keys: profile (dict or None), pages, groups.
+        """
+        body = None
+        try:
+            response = self._session.get(_ME_BUNDLE_URL + quote_plus(access_token), timeout=30)
+            if response.status_code == 200:
+                body = _json_loads(response.content)
+            else:
+                logger.warning(
+                    "Facebook bundle fetch failed, using separate lookups: %s - %s",
+                    response.status_code, _LazyText(response),
+                )
+        except _DISCOVERY_ERRORS as e:
+            logger.warning("Facebook bundle fetch failed, using separate lookups: %s", e)
+
+        if body is None:
+            return {
+                "profile": self.get_user_profile(access_token),
+                "pages": self.get_user_pages(access_token),
+                "groups": self.get_user_groups(access_token),
+            }
+
+        page_sources = [self._expand_edge(body.get("accounts"), "Facebook pages")]
+        for biz in self._expand_edge(body.get("businesses"), "business pages"):
+            page_sources.append(
+                self._expand_edge(biz.get("owned_pages"), f"business {biz.get('id')} pages")
+            )
+
+        bundle = {
+            "profile": {k: body[k] for k in ("id", "name", "picture") if k in body},
+            "pages": _unique_by_id(page_sources),
+            "groups": self._expand_edge(body.get("groups"), "groups"),
+        }
+
+        token_key = _token_key(access_token)
+        for kind in _DISCOVERY_KINDS:
+            if bundle[kind]:
+                self._discovery_cache.set((kind, token_key), bundle[kind])
+        return bundle
+
+    def _expand_edge(self, edge: dict | None, label: str) -> list[dict]:
+        """Return the items of an expanded edge, following its paging links."""
+        if not edge:
+            return []
+        items = list(edge.get("data", []))
+        next_url = edge.get("paging", {}).get("next")
+        if next_url:
+            try:
+                items.extend(self._iter_pages(next_url, {}, label))
+            except _DISCOVERY_ERRORS as e:
+                logger.error("Error fetching %s: %s", label, e)
+        return items
+
+    def _iter_pages(
+        self,
+        url: str,
+        params: dict,
+        label: str,
+        level: int = logging.ERROR,
+    ) -> Iterator[dict]:
+        """Yield every ``data`` item, following ``paging.next`` links from *url*.
+
+        A non-200 response is logged at *level* and ends the walk. Request
+        and decode errors propagate to the caller, after any items already
+        yielded.
+        """
+        while url:
+            response = self._session.get(url, params=params, timeout=30)
+            if response.status_code != 200:
+                logger.log(level, "Failed to fetch %s: %s - %s", label, response.status_code, _LazyText(response))
+                return
+            data = _json_loads(response.content)
+            yield from data.get("data", [])
+            url = data.get("paging", {}).get("next")
+            # The ``next`` URL already carries the query string.
+            params = {}
+
     # ------------------------------------------------------------------
     # Publishing – Pages
     # ------------------------------------------------------------------
@@ -231,17 +526,17 @@ class FacebookClient:
     ) -> dict:
         """Publish a text-only post to a Facebook Page."""
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{GRAPH_API_BASE}/{page_id}/feed",
                 data={"message": text, "access_token": page_access_token},
                 timeout=30,
             )
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 return {
                     "success": True,
                     "post_id": data.get("id"),
-                    "permalink": f"https://www.facebook.com/{data.get('id', '').replace('_', '/posts/')}",
+                    "permalink": _permalink_for_page_post(data.get("id")),
                     "status_code": response.status_code,
                 }
             error_data = _safe_json(response)
@@ -270,12 +565,10 @@ class FacebookClient:
         origins.
         """
         endpoint = f"{GRAPH_API_BASE}/{page_id}/photos"
-        # FB photos endpoint accepts up to ~10MB. Anything larger will be
-        # rejected regardless of upload method, so don't even try.
-        max_bytes = 10 * 1024 * 1024
+        max_bytes = PHOTO_MAX_BYTES
 
         def _post_via_url() -> tuple[int, dict]:
-            r = requests.post(
+            r = self._session.post(
                 endpoint,
                 data={
                     "message": text,
@@ -288,9 +581,13 @@ class FacebookClient:
 
         def _post_via_bytes() -> tuple[int, dict]:
             logger.info("Downloading image for Facebook byte upload: %s", image_url)
-            img_resp = requests.get(image_url, timeout=30, stream=True)
+            img_resp = self._session.get(image_url, timeout=30, stream=True)
             img_resp.raise_for_status()
-            content = img_resp.raw.read(max_bytes + 1, decode_content=True)
+            try:
+                content = img_resp.raw.read(max_bytes + 1, decode_content=True)
+            finally:
+                # Hand the connection back to the session pool.
+                img_resp.close()
             if len(content) > max_bytes:
                 return 0, {
                     "error": {
@@ -302,7 +599,7 @@ class FacebookClient:
                 }
             mime = img_resp.headers.get("Content-Type", "image/jpeg").split(";")[0].strip()
             filename = image_url.rsplit("/", 1)[-1].split("?")[0] or "image.jpg"
-            r = requests.post(
+            r = self._session.post(
                 endpoint,
                 data={"message": text, "access_token": page_access_token},
                 files={"source": (filename, content, mime)},
@@ -333,7 +630,7 @@ class FacebookClient:
                 return {
                     "success": True,
                     "post_id": post_id,
-                    "permalink": f"https://www.facebook.com/{post_id.replace('_', '/posts/')}" if post_id else None,
+                    "permalink": _permalink_for_page_post(post_id),
                     "status_code": status,
                 }
 
@@ -343,6 +640,54 @@ class FacebookClient:
             logger.error("Facebook image post request failed: %s", e)
             return {"success": False, "error": {"message": str(e)}}
 
+    def publish_image_post_local(
+        self,
+        page_access_token: str,
+        page_id: str,
+        text: str,
+        image_path: str,
+    ) -> dict:
+        """Publish a post with an image read from a local file.
+
+        Uploads the file directly via multipart ``source=`` instead of
+        making Facebook fetch it from a URL, which skips FB's (often slow)
+        remote fetch and works for files that aren't publicly reachable.
+        """
+        try:
+            size = os.path.getsize(image_path)
+        except OSError as e:
+            logger.error("Facebook local image not readable: %s", e)
+            return {"success": False, "error": {"message": str(e)}}
+        if size > PHOTO_MAX_BYTES:
+            return {
+                "success": False,
+                "error": {"message": f"Image exceeds Facebook's ~10MB photo limit ({size} bytes)"},
+            }
+
+        mime = mimetypes.guess_type(image_path)[0] or "image/jpeg"
+        try:
+            with open(image_path, "rb") as f:
+                response = self._session.post(
+                    f"{GRAPH_API_BASE}/{page_id}/photos",
+                    data={"message": text, "access_token": page_access_token},
+                    files={"source": (os.path.basename(image_path), f, mime)},
+                    timeout=120,
+                )
+            data = _safe_json(response)
+            if response.status_code == 200:
+                post_id = data.get("post_id") or data.get("id", "")
+                return {
+                    "success": True,
+                    "post_id": post_id,
+                    "permalink": _permalink_for_page_post(post_id),
+                    "status_code": response.status_code,
+                }
+            logger.error("Facebook local image post failed: %s - %s", response.status_code, data)
+            return {"success": False, "status_code": response.status_code, "error": data}
+        except (OSError, requests.RequestException) as e:
+            logger.error("Facebook local image post request failed: %s", e)
+            return {"success": False, "error": {"message": str(e)}}
+
     def publish_link_post(
         self,
         page_access_token: str,
@@ -352,7 +697,7 @@ class FacebookClient:
     ) -> dict:
         """Publish a post with a link preview to a Facebook Page."""
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{GRAPH_API_BASE}/{page_id}/feed",
                 data={
                     "message": text,
@@ -362,11 +707,11 @@ class FacebookClient:
                 timeout=30,
             )
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 return {
                     "success": True,
                     "post_id": data.get("id"),
-                    "permalink": f"https://www.facebook.com/{data.get('id', '').replace('_', '/posts/')}",
+                    "permalink": _permalink_for_page_post(data.get("id")),
                     "status_code": response.status_code,
                 }
             error_data = _safe_json(response)
@@ -396,17 +741,17 @@ class FacebookClient:
             payload["link"] = link
 
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{GRAPH_API_BASE}/{group_id}/feed",
                 data=payload,
                 timeout=30,
             )
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 return {
                     "success": True,
                     "post_id": data.get("id"),
-                    "permalink": f"https://www.facebook.com/groups/{group_id}/posts/{data.get('id', '').split('_')[-1]}" if data.get("id") else None,
+                    "permalink": _permalink_for_group_post(group_id, data.get("id")),
                     "status_code": response.status_code,
                 }
             error_data = _safe_json(response)
@@ -416,6 +761,108 @@ class FacebookClient:
             logger.error("Facebook group post request failed: %s", e)
             return {"success": False, "error": {"message": str(e)}}
 
+    # ------------------------------------------------------------------
+    # Batch requests
+    # ------------------------------------------------------------------
+
+    def _send_batch(self, access_token: str, batch: list[dict]) -> list[dict | None]:
+        """POST *batch* to the Graph batch endpoint, chunked by BATCH_LIMIT.
+
+        Returns one entry per sub-request, in order. Entries are the raw
+        sub-responses (``code``/``headers``/``body``) or None when Facebook
+        did not complete that sub-request.
+        """
+        results: list[dict | None] = []
+        for start in range(0, len(batch), BATCH_LIMIT):
+            chunk = batch[start:start + BATCH_LIMIT]
+            response = self._session.post(
+                f"{GRAPH_API_BASE}/",
+                data={"batch": json.dumps(chunk), "access_token": access_token},
+                timeout=60,
+            )
+            response.raise_for_status()
+            results.extend(_json_loads(response.content))
+        return results
+
+    def get_objects_batch(self, access_token: str, relative_urls: list[str]) -> list[dict | None]:
+        """Fetch several Graph objects in one round-trip.
+
+        *relative_urls* are paths relative to the API version, e.g.
+        ``"me?fields=id,name"``. Returns the decoded body for each URL, or
+        None for sub-requests that failed.
+        """
+        batch = [{"method": "GET", "relative_url": url} for url in relative_urls]
+        try:
+            responses = self._send_batch(access_token, batch)
+        except requests.RequestException as e:
+            logger.error("Facebook batch fetch failed: %s", e)
+            return [None] * len(relative_urls)
+
+        bodies: list[dict | None] = []
+        for url, sub in zip(relative_urls, responses):
+            if sub and sub.get("code") == 200:
+                bodies.append(_safe_json_loads(sub.get("body")))
+            else:
+                logger.error("Facebook batch fetch of %s failed: %s", url, sub)
+                bodies.append(None)
+        return bodies
+
+    def publish_batch(self, access_token: str, posts: list[dict]) -> list[dict]:
+        """Publish to several Pages/Groups using the Graph batch endpoint.
+
+        Each item in *posts* has ``message``, either ``page_id`` or
+        ``group_id``, and optionally ``link`` and ``access_token`` (needed
+        for Pages, which require their own page token; defaults to
+        *access_token*).
+
+        Returns one result dict per post, shaped like the ``publish_*``
+        methods' return values.
+        """
+        batch = []
+        for post in posts:
+            target = post.get("page_id") or post.get("group_id")
+            body = {"message": post["message"]}
+            if post.get("link"):
+                body["link"] = post["link"]
+            if post.get("access_token"):
+                body["access_token"] = post["access_token"]
+            batch.append({
+                "method": "POST",
+                "relative_url": f"{target}/feed",
+                "body": urlencode(body),
+            })
+
+        try:
+            responses = self._send_batch(access_token, batch)
+        except requests.RequestException as e:
+            logger.error("Facebook batch publish request failed: %s", e)
+            return [{"success": False, "error": {"message": str(e)}} for _ in posts]
+
+        results: list[dict] = []
+        for post, sub in zip(posts, responses):
+            if sub is None:
+                results.append({"success": False, "error": {"message": "Batch sub-request did not complete"}})
+                continue
+            status = sub.get("code")
+            data = _safe_json_loads(sub.get("body"))
+            if status == 200:
+                post_id = data.get("id", "")
+                if post.get("group_id"):
+                    permalink = _permalink_for_group_post(post["group_id"], post_id)
+                else:
+                    permalink = _permalink_for_page_post(post_id)
+                results.append({
+                    "success": True,
+                    "post_id": post_id,
+                    "permalink": permalink,
+                    "status_code": status,
+                })
+            else:
+                logger.error("Facebook batch post to %s failed: %s - %s",
+                             post.get("page_id") or post.get("group_id"), status, data)
+                results.append({"success": False, "status_code": status, "error": data})
+        return results
+
     # ------------------------------------------------------------------
     # Smart post (auto-detects URLs)
     # ------------------------------------------------------------------
@@ -428,13 +875,12 @@ class FacebookClient:
         image_url: str | None = None,
     ) -> dict:
         """Post to a Page, choosing text/image/link format automatically."""
-        import re
-        url_match = re.search(r'https?://[^\s<>"\')\]]+', text)
+        url_match = _URL_RE.search(text)
 
         if image_url:
             return self.publish_image_post(page_access_token, page_id, text, image_url)
         elif url_match:
-            return self.publish_link_post(page_access_token, page_id, text, url_match.group(0).rstrip(".,;:!?"))
+            return self.publish_link_post(page_access_token, page_id, text, url_match.group(0).rstrip(_URL_TRAILING_PUNCT))
         else:
             return self.publish_text_post(page_access_token, page_id, text)
 
@@ -443,29 +889,188 @@ class FacebookClient:
 # Module-level helpers
 # ------------------------------------------------------------------
 
+def _usage_percent(response: requests.Response) -> float:
+    """Return the highest quota percentage reported in Graph usage headers.
+
+    ``X-App-Usage`` is a flat ``{"call_count": n, ...}`` object;
+    ``X-Business-Use-Case-Usage`` maps business ids to lists of such
+    objects. Missing or malformed headers count as 0.
+    """
+    buckets: list[dict] = []
+    try:
+        app_usage = response.headers.get("X-App-Usage")
+        if app_usage:
+            buckets.append(json.loads(app_usage))
+        biz_usage = response.headers.get("X-Business-Use-Case-Usage")
+        if biz_usage:
+            for entries in json.loads(biz_usage).values():
+                buckets.extend(entries)
+    except (ValueError, AttributeError, TypeError):
+        return 0.0
+
+    highest = 0.0
+    for bucket in buckets:
+        for name in ("call_count", "total_time", "total_cputime"):
+            value = bucket.get(name) if isinstance(bucket, dict) else None
+            if isinstance(value, (int, float)):
+                highest = max(highest, float(value))
+    return highest
+
+
+def _is_rate_limited(response: requests.Response) -> bool:
+    """True for a Graph error response carrying a rate-limit error code."""
+    if response.status_code not in (400, 403):
+        return False
+    try:
+        error = (_json_loads(response.content) or {}).get("error") or {}
+    except (ValueError, AttributeError):
+        return False
+    return error.get("code") in RATE_LIMIT_ERROR_CODES
+
+
+def _rate_limit_hook(response: requests.Response, *args, **kwargs) -> requests.Response:
+    """Session response hook that backs off when Graph reports throttling.
+
+    Rate-limited GETs are resent with exponential backoff and jitter (other
+    methods are returned as-is, since their bodies may not be replayable).
+    When usage headers report more than USAGE_THROTTLE_PERCENT of quota
+    used, the hook pauses briefly so the next call doesn't push the app
+    over the limit.
+    """
+    if not response.url.startswith(GRAPH_API_HOST):
+        return response
+
+    attempt = 0
+    while (
+        attempt < RATE_LIMIT_RETRIES
+        and response.request.method in ("GET", "HEAD")
+        and _is_rate_limited(response)
+    ):
+        delay = min(RATE_LIMIT_BACKOFF_CAP, RATE_LIMIT_BACKOFF_BASE * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        logger.warning("Facebook rate limit hit; retrying in %.1fs", delay)
+        time.sleep(delay)
+        response.close()
+        prepared = response.request.copy()
+        retried = response.connection.send(prepared, **kwargs)
+        retried.history = [*response.history, response]
+        retried.request = prepared
+        response = retried
+        attempt += 1
+
+    usage = _usage_percent(response)
+    if usage > USAGE_THROTTLE_PERCENT:
+        pause = min(RATE_LIMIT_BACKOFF_CAP, (usage - USAGE_THROTTLE_PERCENT) / 25)
+        logger.info("Facebook API usage at %.0f%%; pausing %.1fs", usage, pause)
+        time.sleep(pause)
+    return response
+
+
+class _LazyText:
+    """Defer decoding a response body until a log record is actually emitted.
+
+    Bodies are truncated to LOG_BODY_LIMIT characters so pathological
+    error pages don't bloat the logs.
+    """
+
+    __slots__ = ("response",)
+
+    def __init__(self, response: requests.Response):
+        self.response = response
+
+    def __str__(self) -> str:
+        return self.response.text[:LOG_BODY_LIMIT]
+
+
 def _safe_json(response: requests.Response) -> dict:
     try:
-        return response.json()
+        return _json_loads(response.content)
     except Exception:
         return {"raw": response.text}
 
 
+def _unique_by_id(sources: Iterable[list[dict]]) -> list[dict]:
+    """Flatten *sources* in order, keeping the first dict seen for each id."""
+    seen_ids: set[str] = set()
+    merged: list[dict] = []
+    for items in sources:
+        for item in items:
+            if item["id"] not in seen_ids:
+                seen_ids.add(item["id"])
+                merged.append(item)
+    return merged
+
+
+def _permalink_for_page_post(post_id: str | None) -> str | None:
+    """Build a Page post URL from a ``{page_id}_{post_id}`` Graph id."""
+    if not post_id:
+        return None
+    page, sep, post = post_id.partition("_")
+    if not sep:
+        # Bare object ids (e.g. photos) resolve on facebook.com directly.
+        return f"https://www.facebook.com/{post_id}"
+    return f"https://www.facebook.com/{page}/posts/{post}"
+
+
+def _permalink_for_group_post(group_id: str, post_id: str | None) -> str | None:
+    """Build a Group post URL from a ``{group_id}_{post_id}`` Graph id."""
+    if not post_id:
+        return None
+    return f"https://www.facebook.com/groups/{group_id}/posts/{post_id.rpartition('_')[2]}"
+
+
+def _safe_json_loads(body: str | None) -> dict:
+    """Decode a batch sub-response body, which arrives as a JSON string."""
+    try:
+        return _json_loads(body) if body else {}
+    except ValueError:
+        return {"raw": body}
+
+
+@lru_cache(maxsize=1)
 def get_facebook_client() -> FacebookClient:
-    """Factory function to get a configured Facebook client."""
+    """Factory function to get a configured Facebook client.
+
+    The client is cached so request handlers share one connection pool.
+    """
     return FacebookClient()
 
 
 def calculate_token_expiry(expires_in: int) -> str:
-    expiry = datetime.utcnow() + timedelta(seconds=expires_in)
-    return expiry.isoformat(timespec="seconds")
+    # Stored as naive UTC ISO to stay compatible with existing rows.
+    expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+    return expiry.replace(tzinfo=None).isoformat(timespec="seconds")
+
+
+def calculate_token_expiry_epoch(expires_in: int) -> int:
+    """Like calculate_token_expiry, but as integer seconds since the epoch."""
+    return int(time.time()) + expires_in
+
+
+@lru_cache(maxsize=256)
+def _expiry_to_epoch(expires_at: str) -> float:
+    """Parse a stored ISO expiry (naive means UTC) into epoch seconds.
 
+    The same stored string is checked on every authenticated request, so
+    the parse result is memoized.
+    """
+    expiry = datetime.fromisoformat(expires_at)
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry.timestamp()
 
-def is_token_expired(expires_at: str | None, buffer_minutes: int = 60) -> bool:
+
+def is_token_expired(expires_at: str | float | None, buffer_minutes: int = 60) -> bool:
+    """Return True if the token expires within *buffer_minutes*.
+
+    *expires_at* may be an epoch timestamp or an ISO string as produced by
+    calculate_token_expiry.
+    """
     if not expires_at:
         return True
-    try:
-        expiry = datetime.fromisoformat(expires_at)
-        buffer = timedelta(minutes=buffer_minutes)
-        return datetime.utcnow() >= (expiry - buffer)
-    except (ValueError, TypeError):
-        return True
+    if not isinstance(expires_at, (int, float)):
+        try:
+            expires_at = _expiry_to_epoch(expires_at)
+        except (ValueError, TypeError):
+            return True
+    return time.time() >= expires_at - buffer_minutes * 60
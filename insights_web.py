@@ -3974,7 +3974,7 @@ def facebook_status():
 
     if facebook_is_token_expired(token['expires_at']):
         try:
-            new_token = client.refresh_access_token(token['access_token'])
+            new_token = client.refresh_access_token(token['access_token'], token['expires_at'])
             expires_at = facebook_calculate_token_expiry(new_token.get('expires_in', 5184000))
             update_facebook_token(
                 access_token=new_token['access_token'],
@@ -4055,16 +4055,17 @@ def facebook_callback():
 
         expires_at = facebook_calculate_token_expiry(expires_in)
 
-        user_info = client.get_user_profile(access_token)
+        bundle = client.get_user_bundle(access_token)
+        user_info = bundle['profile']
         user_id = user_info.get('id', '') if user_info else ''
         user_name = user_info.get('name', 'Facebook User') if user_info else 'Facebook User'
 
-        pages = client.get_user_pages(access_token)
+        pages = bundle['pages']
         page_id = pages[0]['id'] if pages else None
         page_name = pages[0]['name'] if pages else None
         page_access_token = pages[0]['access_token'] if pages else None
 
-        groups = client.get_user_groups(access_token)
+        groups = bundle['groups']
         group_ids = ','.join(g['id'] for g in groups) if groups else None
 
         save_facebook_token(
@@ -4096,6 +4097,9 @@ def facebook_callback():
 @app.route('/facebook/disconnect', methods=['POST'])
 def facebook_disconnect():
     """Disconnect Facebook account."""
+    token = get_facebook_token()
+    if token and token['access_token']:
+        get_facebook_client().invalidate_cache(token['access_token'])
     delete_facebook_token()
     return jsonify({"success": True, "message": "Facebook disconnected"})
 
@@ -4165,7 +4169,7 @@ def facebook_post_social(post_id: int):
     if facebook_is_token_expired(token['expires_at']):
         client = get_facebook_client()
         try:
-            new_token = client.refresh_access_token(token['access_token'])
+            new_token = client.refresh_access_token(token['access_token'], token['expires_at'])
             expires_at = facebook_calculate_token_expiry(new_token.get('expires_in', 5184000))
             update_facebook_token(
                 access_token=new_token['access_token'],
@@ -4236,7 +4240,7 @@ def compose_post_to_facebook(post_id: int):
     if facebook_is_token_expired(token['expires_at']):
         client = get_facebook_client()
         try:
-            new_token = client.refresh_access_token(token['access_token'])
+            new_token = client.refresh_access_token(token['access_token'], token['expires_at'])
             expires_at = facebook_calculate_token_expiry(new_token.get('expires_in', 5184000))
             update_facebook_token(
                 access_token=new_token['access_token'],
@@ -9852,7 +9856,7 @@ def scheduled_post_worker() -> None:
                         if facebook_is_token_expired(facebook_token['expires_at']):
                             fb_client = get_facebook_client()
                             try:
-                                new_token = fb_client.refresh_access_token(facebook_token['access_token'])
+                                new_token = fb_client.refresh_access_token(facebook_token['access_token'], facebook_token['expires_at'])
                                 expires_at = facebook_calculate_token_expiry(new_token.get('expires_in', 5184000))
                                 update_facebook_token(
                                     access_token=new_token['access_token'],